@@ -1,42 +1,347 @@
-import requests
+import asyncio
+import time
+import aiohttp
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 import pandas as pd
 import numpy as np
-import datetime as dt 
-from datetime import time 
+from numba import njit
+from concurrent.futures import ThreadPoolExecutor
+from cmds.cache import FileCache
+
+# Alpaca bar fields -> (column name, dtype); 't' (timestamp) is kept as the raw RFC 3339 strings.
+# US equity prices fit float32. Volume/count are fetched as uint64 since daily/weekly/monthly bars
+# can exceed 2**32; `_bar_dtypes` narrows them to uint32 for intraday timeframes.
+BAR_FIELDS = {
+    'o': ('open', 'f4'),
+    'h': ('high', 'f4'),
+    'l': ('low', 'f4'),
+    'c': ('close', 'f4'),
+    'v': ('volume', 'u8'),
+    'n': ('count', 'u8'),
+    'vw': ('vwap', 'f4'),
+}
+BAR_COLUMNS = tuple(name for name, _ in BAR_FIELDS.values())
+
+# Gateway errors worth retrying with back-off, alongside connection-level failures
+RETRY_STATUSES = {502, 503, 504}
+
+def _is_transient(exc):
+    '''
+    True for connection-level failures and gateway errors; other HTTP errors (e.g. 4xx) are not retried.
+    '''
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in RETRY_STATUSES
+    return isinstance(exc, aiohttp.ClientError)
+
+def _fields_for(columns):
+    '''
+    Maps requested column names to Alpaca bar fields, in the canonical column order.
+    '''
+    if columns is None:
+        return tuple(BAR_FIELDS)
+    unknown = set(columns) - set(BAR_COLUMNS)
+    if unknown:
+        raise ValueError(f'unknown columns {sorted(unknown)}; expected a subset of {BAR_COLUMNS}')
+    return tuple(key for key, (name, _) in BAR_FIELDS.items() if name in columns)
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+SESSION_OPEN_NS = (9 * 3600 + 30 * 60) * 1_000_000_000 # 09:30 ET
+SESSION_LAST_NS = (15 * 3600 + 55 * 60) * 1_000_000_000 # 15:55 ET, last 5 minute bar
+
+@njit(cache=True)
+def build_mask(local_ns, open_ns, last_ns, min_bars):
+    '''
+    Fused regular-session and complete-day filter over wall-clock (US/Eastern) nanosecond timestamps.
+
+    A bar is kept if its time of day lies in `[open_ns, last_ns]` and its day has at least
+    `min_bars` in-session bars. Days are bucketed by sorting the in-session day numbers and
+    counting runs, so no hashing or per-row Python objects are involved.
+
+    Args:
+        local_ns (numpy.ndarray): int64 wall-clock timestamps in nanoseconds.
+        open_ns (int): First kept time of day, in nanoseconds since midnight.
+        last_ns (int): Last kept time of day, in nanoseconds since midnight.
+        min_bars (int): Minimum number of in-session bars for a day to count as complete.
+
+    Returns:
+        tuple: (keep mask, incomplete day numbers, their bar counts, number of complete days).
+    '''
+    n = local_ns.shape[0]
+    days = local_ns // NS_PER_DAY
+    in_session = np.empty(n, dtype=np.bool_)
+    n_session = 0
+    for i in range(n):
+        time_of_day = local_ns[i] - days[i] * NS_PER_DAY
+        in_session[i] = open_ns <= time_of_day <= last_ns
+        if in_session[i]:
+            n_session += 1
+
+    session_days = np.empty(n_session, dtype=np.int64)
+    j = 0
+    for i in range(n):
+        if in_session[i]:
+            session_days[j] = days[i]
+            j += 1
+    session_days.sort()
+
+    unique_days = np.empty(n_session, dtype=np.int64)
+    day_counts = np.empty(n_session, dtype=np.int64)
+    k = 0
+    for j in range(n_session):
+        if k > 0 and session_days[j] == unique_days[k - 1]:
+            day_counts[k - 1] += 1
+        else:
+            unique_days[k] = session_days[j]
+            day_counts[k] = 1
+            k += 1
+    unique_days = unique_days[:k]
+    day_counts = day_counts[:k]
+
+    keep = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        if in_session[i]:
+            keep[i] = day_counts[np.searchsorted(unique_days, days[i])] >= min_bars
+
+    complete = day_counts >= min_bars
+    return keep, unique_days[~complete], day_counts[~complete], complete.sum()
+
+def _expected_bars(timeframe: str, start: str, end: str):
+    '''
+    Upper-bound estimate of the bars per symbol in `[start, end]`, or None for calendar timeframes ('1Week', '1Month').
+    '''
+    try:
+        step = pd.Timedelta(timeframe)
+    except ValueError:
+        return None
+    return int((pd.to_datetime(end, utc=True) - pd.to_datetime(start, utc=True)) / step) + 64
+
+def _bar_dtypes(timeframe: str):
+    '''
+    Fixed output dtype per bar column for `timeframe`: volume/count are uint32 for intraday bars
+    and stay uint64 for daily and longer bars.
+    '''
+    try:
+        intraday = pd.Timedelta(timeframe) < pd.Timedelta(days=1)
+    except ValueError:
+        intraday = False
+    dtypes = dict(BAR_FIELDS.values())
+    if intraday:
+        dtypes.update(volume='u4', count='u4')
+    return dtypes
+
+def _cast_bars(df: pd.DataFrame, timeframe: str):
+    '''
+    Casts bar columns to the fixed dtypes for `timeframe` and `symbol` to category, so fresh
+    downloads and cache hits (including legacy float64/int64 pickles) share one schema.
+    Only columns whose dtype differs are cast.
+    '''
+    dtypes = {col: dtype for col, dtype in _bar_dtypes(timeframe).items() if col in df and df[col].dtype != dtype}
+    for col, dtype in dtypes.items():
+        if np.dtype(dtype).kind == 'u' and len(df) and df[col].max() > np.iinfo(dtype).max:
+            raise ValueError(f'{col} exceeds the {np.dtype(dtype)} range of {timeframe} bars')
+    if df['symbol'].dtype != 'category':
+        dtypes['symbol'] = 'category'
+    return df.astype(dtypes) if dtypes else df
+
+class _BarBuffer:
+    '''
+    Pre-sized typed arrays (one per requested Alpaca bar field, plus 't') filled page by page through a write cursor.
+
+    Sized up front from the expected bar count so pages are copied in once rather than grown
+    list by list; doubles if the estimate is exceeded and is trimmed in place by `columns()`.
+    '''
+
+    def __init__(self, capacity: int, fields: tuple = tuple(BAR_FIELDS)):
+        self.size = 0
+        self.arrays = {'t': np.empty(capacity, dtype=object)}
+        self.arrays.update({key: np.empty(capacity, dtype=BAR_FIELDS[key][1]) for key in fields})
+
+    def extend(self, barlist: list):
+        n = len(barlist)
+        end = self.size + n
+        capacity = len(self.arrays['t'])
+        if end > capacity:
+            for arr in self.arrays.values():
+                arr.resize(max(end, 2 * capacity), refcheck=False)
+        for key, arr in self.arrays.items():
+            arr[self.size:end] = [bar[key] for bar in barlist]
+        self.size = end
+
+    def columns(self):
+        '''
+        Trims the arrays to the bars written and returns them keyed by Alpaca field name.
+        '''
+        for arr in self.arrays.values():
+            arr.resize(self.size, refcheck=False)
+        return self.arrays
+
+def _run(coro):
+    '''
+    Drives `coro` to completion with `asyncio.run`.
+
+    Inside Jupyter (e.g. `%run -i scripts/download_data.py`) an event loop is already running
+    on the main thread, so the coroutine is handed to a fresh loop on a worker thread instead.
+    '''
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
 
-def safe_get(url, headers, params):
+class RateLimiter:
+    '''
+    Token-bucket limiter that spaces requests to stay under Alpaca's per-minute quota.
+
+    The bucket starts from `capacity` requests per minute (200 on the basic data plan) and is
+    resized from the 'X-RateLimit-Limit' header of the first response, so the quota of the
+    account actually in use is honoured. Tokens refill continuously at `capacity / 60` per second.
+
+    Attributes:
+        tokens (float): Requests that may be issued immediately.
+        capacity (int): Maximum bucket size (requests per minute).
+        refill_per_sec (float): Tokens added back per second.
+    '''
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.refill_per_sec = capacity / 60
+        self._updated = time.monotonic()
+        self._calibrated = False
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+    async def acquire(self):
+        '''
+        Waits until a token is available and consumes it.
+        '''
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.refill_per_sec)
+
+    def update(self, headers):
+        '''
+        Resizes the bucket from the 'X-RateLimit-Limit' header of the first response.
+        '''
+        if self._calibrated or 'X-RateLimit-Limit' not in headers:
+            return
+        self._calibrated = True
+        self._refill()
+        capacity = int(headers['X-RateLimit-Limit'])
+        self.tokens = min(self.tokens, capacity)
+        self.capacity = capacity
+        self.refill_per_sec = capacity / 60
+
+@retry(wait=wait_exponential(multiplier=0.5, max=30), stop=stop_after_attempt(5),
+       retry=retry_if_exception(_is_transient), reraise=True)
+async def safe_get(session: aiohttp.ClientSession, limiter: RateLimiter, url: str, params: dict):
     '''
     Sends a GET request to the specified Alpaca REST API endpoint with automatic rate-limit handling.
 
-    If the server responds with HTTP 429 (Too Many Requests), the function reads the 
-    'X-RateLimit-Reset' response header to determine how long to wait before retrying.
-    It sleeps for the required duration and retries the same request until a successful 
-    response is received.
+    Every request first takes a token from `limiter`, so requests are paced ahead of the quota
+    rather than after a rejection. Should the server still respond with HTTP 429 (Too Many Requests),
+    the function reads the 'X-RateLimit-Reset' response header to determine how long to wait before
+    retrying. It awaits the required duration (without blocking other in-flight requests) and retries
+    the same request until a successful response is received. Transient network errors and
+    502/503/504 responses are retried with exponential back-off; any other non-2xx status raises
+    `aiohttp.ClientResponseError`, so error bodies are never mistaken for (or cached as) pages.
 
     Args:
+        session (aiohttp.ClientSession): Open session carrying the Alpaca API authentication headers.
+        limiter (RateLimiter): Shared token bucket for the session.
         url (str): The API endpoint URL.
-        headers (dict): HTTP headers, including Alpaca API authentication.
         params (dict): Query parameters for the GET request.
 
     Returns:
-        requests.Response: The HTTP response object from the successful request.
+        dict: The decoded JSON body of the successful response.
     '''
     while True:
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 429:
-            reset_ts = int(response.headers.get('X-RateLimit-Reset', time.time() + 60))
-            sleep_seconds = max(reset_ts - int(time.time()), 1)
-            print(f"Rate limit exceeded. Sleeping for {sleep_seconds} seconds...")
-            time.sleep(sleep_seconds)
-        else:
-            return response
+        await limiter.acquire()
+        async with session.get(url, params=params) as response:
+            limiter.update(response.headers)
+            if response.status == 429:
+                reset_ts = int(response.headers.get('X-RateLimit-Reset', time.time() + 60))
+                sleep_seconds = max(reset_ts - int(time.time()), 1)
+                print(f"Rate limit exceeded. Sleeping for {sleep_seconds} seconds...")
+                await asyncio.sleep(sleep_seconds)
+            else:
+                response.raise_for_status()
+                return orjson.loads(await response.read())
 
-def download_intraday_dict(symbols: str, timeframe: str, start: str, end: str, limit: int, api_key: str, secret_key: str, stocks: bool = True):
+async def _download_chain(session: aiohttp.ClientSession, limiter: RateLimiter, semaphore: asyncio.Semaphore, url: str, symbols: str, timeframe: str, start: str, end: str, limit: int, cache: FileCache = None, fields: tuple = tuple(BAR_FIELDS)):
+    '''
+    Walks the full `next_page_token` chain for one shard of symbols.
+
+    Each shard owns its own pagination loop so that several chains can be awaited concurrently;
+    `semaphore` caps how many chains (and therefore requests) are in flight at once.
+    Pages already held in `cache` are replayed from disk instead of being requested again.
+    Only the bar `fields` requested (plus the timestamp) are copied out of each page.
+
+    Returns:
+        dict: A dictionary where keys are symbol strings and values are dictionaries of per-field
+              arrays, keyed by Alpaca's bar field names ('t', 'o', 'h', ...).
+    '''
+    capacity = _expected_bars(timeframe, start, end) or limit
+    symbol_bars = {}
+    async with semaphore:
+        next_token = None
+        while True:
+            params = {
+                'symbols': symbols,
+                'timeframe': timeframe,
+                'start': start,
+                'end': end,
+                'adjustment': 'raw',
+                'feed': 'sip',
+                'sort': 'asc',
+                'limit': limit
+            }
+            if next_token:
+                params['page_token'] = next_token
+
+            data = cache.get_page(params) if cache is not None else None
+            if data is None:
+                data = await safe_get(session, limiter, url, params)
+                if 'bars' not in data:
+                    raise ValueError(f'Unexpected response from Alpaca: {data}')
+                if cache is not None:
+                    cache.put_page(params, data)
+
+            for symbol, barlist in (data['bars'] or {}).items():
+                # Transpose bars into one pre-sized array per field as they arrive
+                if symbol not in symbol_bars:
+                    symbol_bars[symbol] = _BarBuffer(capacity, fields)
+                symbol_bars[symbol].extend(barlist)
+
+                if barlist:
+                    first_time = barlist[0]['t']
+                    last_time = barlist[-1]['t']
+                    print(f"[{symbol}] Fetched {len(barlist)} bars from {first_time} to {last_time}")
+
+            next_token = data.get("next_page_token")
+            if not next_token:
+                break
+
+    return {symbol: buffer.columns() for symbol, buffer in symbol_bars.items()}
+
+async def download_intraday_dict(symbols: str, timeframe: str, start: str, end: str, limit: int, api_key: str, secret_key: str, stocks: bool = True, max_concurrency: int = 10, cache: FileCache = None, columns: tuple = None):
     """
     Fetches raw intraday bar data for specified symbols from the Alpaca API.
 
-    This function retrieves bar data for the given symbols
-    within the specified time range and timeframe. It handles pagination and rate limiting.
+    This coroutine retrieves bar data for the given symbols
+    within the specified time range and timeframe. Symbols are packed into groups whose expected
+    bar count fits within one `limit`-sized page, each group owns one pagination chain, and all
+    chains run concurrently on a shared, keep-alive HTTP session.
+    It handles pagination and rate limiting.
 
     Parameters:
         symbols (str): Comma-separated list of stock symbols (e.g., 'AAPL,TSLA').
@@ -47,13 +352,19 @@ def download_intraday_dict(symbols: str, timeframe: str, start: str, end: str, l
         api_key (str): Alpaca API key.
         secret_key (str): Alpaca secret key.
         stocks (bool, optional): If True, fetches stock data; currently only supports stocks.
+        max_concurrency (int, optional): Maximum number of requests in flight at once.
+        cache (FileCache, optional): If given, raw pages are cached on disk so an interrupted download resumes.
+        columns (tuple, optional): Bar columns to keep (e.g., ('close', 'volume')); defaults to all.
 
     Returns:
-        dict: A dictionary where keys are symbol strings and values are lists of bar data dictionaries.
+        dict: A dictionary where keys are symbol strings and values are dictionaries of per-field
+              arrays, keyed by Alpaca's bar field names ('t', 'o', 'h', ...).
     """
 
     if limit > 10000:
         raise ValueError('limit must be <= 10000 (Alpaca API restriction)')
+
+    fields = _fields_for(columns)
     
     API_KEY = api_key
     SECRET_KEY = secret_key
@@ -67,46 +378,40 @@ def download_intraday_dict(symbols: str, timeframe: str, start: str, end: str, l
         'APCA-API-SECRET-KEY': SECRET_KEY
     }
 
+    # Pack as many symbols per request as one page can hold, to save round trips on short windows
+    symbol_list = [symbol.strip() for symbol in symbols.split(',') if symbol.strip()]
+    expected = _expected_bars(timeframe, start, end)
+    group_size = max(1, limit // expected) if expected else 1
+    shards = [','.join(symbol_list[i:i + group_size]) for i in range(0, len(symbol_list), group_size)]
+
+    limiter = RateLimiter()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # One connection pool for every chain, sized to the semaphore so each in-flight request has a connection;
+    # idle connections are kept for 60 s and DNS lookups cached
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=max_concurrency, keepalive_timeout=60, ttl_dns_cache=300)
+
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+        results = await asyncio.gather(*(
+            _download_chain(session, limiter, semaphore, BASE_URL, shard, timeframe, start, end, limit, cache, fields) for shard in shards
+        ))
+
     symbol_bars = {}
-    next_token = None
-    while True:
-        params = {
-            'symbols': symbols,
-            'timeframe': timeframe,
-            'start': start,
-            'end': end,
-            'adjustment': 'raw',
-            'feed': 'sip',
-            'sort': 'asc',
-            'limit': limit
-        }
-        if next_token:
-            params['page_token'] = next_token
-
-        response = safe_get(BASE_URL, headers, params)
-        data = response.json()
-
-        for symbol, barlist in data.get("bars", {}).items():
-            symbol_bars.setdefault(symbol, []).extend(barlist)
-
-            if barlist:
-                first_time = barlist[0]['t']
-                last_time = barlist[-1]['t']
-                print(f"[{symbol}] Fetched {len(barlist)} bars from {first_time} to {last_time}")
-
-        next_token = data.get("next_page_token")
-        if not next_token:
-            break
+    for shard_bars in results:
+        symbol_bars.update(shard_bars)
 
     return symbol_bars
 
-def download_intraday(symbols: str, timeframe: str, start: str, end: str, limit: int, api_key: str, secret_key: str, stocks: bool = True):
+def download_intraday(symbols: str, timeframe: str, start: str, end: str, limit: int, api_key: str, secret_key: str, stocks: bool = True, cache: FileCache = None, columns: tuple = None):
     """
     Retrieves and processes intraday bar data for specified symbols from the Alpaca API.
 
     This function fetches raw 5 minute bar data using `download_intraday_dict`, processes it into pandas DataFrames,
     filters out premarket and after-hours data (keeping only 9:30 AM to 3:55 PM US/Eastern),
     removes incomplete trading days, and eliminates duplicate timestamps.
+    If a `cache` is given, symbols whose window is already on disk are loaded from it, and only
+    the remaining symbols are downloaded and then written back to the cache (full-column
+    downloads only; a `columns` projection is served from, but never written to, the cache).
 
     Parameters:
         symbols (str): Comma-separated list of stock symbols (e.g., 'AAPL,TSLA').
@@ -117,69 +422,83 @@ def download_intraday(symbols: str, timeframe: str, start: str, end: str, limit:
         api_key (str): Alpaca API key.
         secret_key (str): Alpaca secret key.
         stocks (bool, optional): If True, fetches stock data; currently only supports stocks.
+        cache (FileCache, optional): On-disk cache consulted before, and updated after, downloading.
+        columns (tuple, optional): Bar columns to parse and keep (e.g., ('close', 'volume')); defaults to
+                                   all of open, high, low, close, volume, count and vwap.
 
     Returns:
         dict: A dictionary where keys are symbol strings and values are pandas DataFrames
               containing processed intraday bar data with datetime indices.
     """
-    
-    symbol_bars = download_intraday_dict(symbols, timeframe, start, end, limit, api_key, secret_key)
+
+    symbol_list = [symbol.strip() for symbol in symbols.split(',') if symbol.strip()]
+    fields = _fields_for(columns)
+    names = [BAR_FIELDS[key][0] for key in fields]
 
     df_dict = {}
+    missing = []
+    for symbol in symbol_list:
+        cached_df = cache.get(symbol, timeframe, start, end, columns=names) if cache is not None else None
+        if cached_df is None:
+            missing.append(symbol)
+        else:
+            print(f"Loaded {symbol} {timeframe} data from cache ({cached_df.index[0]} to {cached_df.index[-1]}).")
+            # Legacy pickles hold float64/int64 columns and object symbols; match fresh downloads
+            df_dict[symbol] = _cast_bars(cached_df, timeframe)
+
+    if not missing:
+        return df_dict
 
-    for symbol, _ in symbol_bars.items():
-        temp_df = pd.DataFrame(symbol_bars[symbol])
+    symbol_bars = _run(download_intraday_dict(','.join(missing), timeframe, start, end, limit, api_key, secret_key, cache=cache, columns=names))
 
-        # Rename columns
-        temp_df.rename(columns={'c': 'close', 'h': 'high', 'l': 'low', 'n': 'count', 'o': 'open', 't': 'datetime', 'v': 'volume', 'vw': 'vwap'}, inplace=True)
+    for symbol, cols in symbol_bars.items():
+        # Columns are already typed per-field arrays; copy=False adopts them as-is
+        temp_df = pd.DataFrame({
+            'datetime': cols['t'],
+            **{BAR_FIELDS[key][0]: cols[key] for key in fields}
+        }, copy=False)
 
-        # Get datetime in ET & remove premarket and after hours data
+        # Get datetime in ET
         temp_df['datetime'] = pd.to_datetime(temp_df['datetime'], utc=True).dt.tz_convert('US/Eastern')
-        temp_df = temp_df[temp_df['datetime'].dt.time.between(time(9, 30), time(15, 55))]
-
-        # Set datetime as index
-        temp_df.index = temp_df['datetime']
-        temp_df = temp_df.drop(columns='datetime')
-
-        # Reorder columns
-        temp_df = temp_df[['open', 'high', 'low', 'close', 'volume', 'count', 'vwap']]
-        
-        temp_date_range = np.unique(temp_df.index.date)
-        temp_com_day_list = []
-        com_day_count = 0
-        first = True
-        skipped_day = False
-        for date in temp_date_range:
-            temp_day_df = temp_df[temp_df.index.date == date]
-
-            if len(temp_day_df) >= 78: # Change for anything other than 5m data
-                temp_com_day_list.append(temp_day_df)
-                com_day_count += 1
-            else:
-                if first:
-                    print('='*74)
-                    first = False
-                skipped_day = True
-                print(f'[{symbol}] Date {date} is incomplete with only {len(temp_day_df)} bars. Removing data.')
-        
-        if first:
-            print('='*74)
-
-        temp_df = pd.concat(temp_com_day_list, axis=0)
-
-        dupes = temp_df.index.duplicated().sum()
+
+        # Remove premarket and after hours data & incomplete days in one compiled pass over ET wall-clock ns
+        local_ns = temp_df['datetime'].dt.tz_localize(None).to_numpy(dtype='datetime64[ns]').view('i8')
+        keep, incomplete_days, incomplete_counts, com_day_count = build_mask(
+            local_ns, SESSION_OPEN_NS, SESSION_LAST_NS, 78 # Change for anything other than 5m data
+        )
+        skipped_day = len(incomplete_days) > 0
+
+        print('='*74)
+        for date, n_bars in zip(pd.to_datetime(incomplete_days * NS_PER_DAY).date, incomplete_counts):
+            print(f'[{symbol}] Date {date} is incomplete with only {n_bars} bars. Removing data.')
+
+        temp_df = temp_df[keep]
+
+        # Set datetime as index & reorder columns
+        temp_df = temp_df.set_index('datetime')[names]
+
+        # Single pass over the int64 index: first occurrence of each timestamp
+        _, first_idx = np.unique(temp_df.index.asi8, return_index=True)
+        dupes = len(temp_df) - len(first_idx)
         if dupes > 0:
             print(f"[{symbol}] Warning: {dupes} duplicate bars found. Removing duplicates.")
-        temp_df = temp_df[~temp_df.index.duplicated(keep='first')]
+            temp_df = temp_df.iloc[np.sort(first_idx)]
 
         if skipped_day:
             print('-'*70)
         print(f"Downloaded {symbol} {timeframe} data from {temp_df.index[0]} to {temp_df.index[-1]} across {com_day_count} complete days.")
 
-        temp_df['symbol'] = symbol
+        temp_df['symbol'] = pd.Categorical.from_codes(np.zeros(len(temp_df), dtype='i1'), [symbol])
+        temp_df = _cast_bars(temp_df, timeframe)
 
         df_dict[symbol] = temp_df
 
     print('='*74)
 
-    return df_dict
\ No newline at end of file
+    if cache is not None:
+        # Projected frames are not stored, so they never replace a full file for the same window
+        if len(names) == len(BAR_COLUMNS):
+            cache.put_many({symbol: df_dict[symbol] for symbol in symbol_bars if symbol in df_dict}, timeframe, start, end)
+        cache.clear_pages()
+
+    return {symbol: df_dict[symbol] for symbol in symbol_list if symbol in df_dict}
\ No newline at end of file
@@ -0,0 +1,215 @@
+import os
+import re
+import glob
+import json
+import pickle
+import hashlib
+import orjson
+import pandas as pd
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+
+def _to_utc(ts):
+    '''
+    Parses an Alpaca start/end string into a UTC timestamp (naive values are treated as UTC, as Alpaca does).
+    '''
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        return ts.tz_localize('UTC')
+    return ts.tz_convert('UTC')
+
+def _drop_cut_days(df, sliced):
+    '''
+    Drops the first/last day of `sliced` if the window cut it short of the bars `df` holds for that day.
+
+    Cached files only hold complete days, so a day with fewer bars in the slice than in the file
+    is one a fresh download of the window would have dropped as incomplete.
+    '''
+    for day in {sliced.index[0].normalize(), sliced.index[-1].normalize()}:
+        next_day = day + pd.Timedelta(days=1)
+        in_slice = (sliced.index >= day) & (sliced.index < next_day)
+        in_file = df.index.searchsorted(next_day) - df.index.searchsorted(day)
+        if in_slice.sum() < in_file:
+            sliced = sliced[~in_slice]
+    return sliced
+
+# Exact UTC window bounds as encoded in cache filenames, e.g. 20220307T170000Z
+_STAMP_FORMAT = '%Y%m%dT%H%M%SZ'
+
+class FileCache:
+    '''
+    On-disk cache for downloaded Alpaca bar data.
+
+    Processed DataFrames are stored one file per symbol under `root`, named
+    `<SYMBOL>_<START>_<END>_<TIMEFRAME>.parquet` with the exact UTC window bounds (e.g.
+    `SPY_20220307T050000Z_20220312T050000Z_5Min.parquet`), so any existing download whose window
+    encloses a new request is reused instead of hitting the network. Files are written as
+    zstd-compressed Parquet with `symbol` as a dictionary-encoded category. Legacy
+    `<SYMBOL>_<START_DATE>_<END_DATE>_<TIMEFRAME>.pkl` files are still read; since their names
+    drop the start time, they serve date-only requests from START_DATE and requests with a time
+    of day from the day after START_DATE.
+
+    Raw JSON pages are additionally stored under `raw_root`, keyed by an md5 of the request
+    parameters (including the page token), so an interrupted pagination chain resumes from the
+    last page it received rather than from the start.
+    '''
+
+    def __init__(self, root: str = 'data/symbols', raw_root: str = 'data/cache/raw'):
+        self.root = root
+        self.raw_root = raw_root
+        self._pages_used = set()
+
+    def path(self, symbol: str, timeframe: str, start: str, end: str):
+        '''
+        Returns the file path a `(symbol, timeframe, start, end)` window is stored under.
+        '''
+        start_stamp = _to_utc(start).strftime(_STAMP_FORMAT)
+        end_stamp = _to_utc(end).strftime(_STAMP_FORMAT)
+        return os.path.join(self.root, f'{symbol}_{start_stamp}_{end_stamp}_{timeframe}.parquet')
+
+    def get(self, symbol: str, timeframe: str, start: str, end: str, columns: list = None):
+        '''
+        Looks up a cached DataFrame covering the requested window.
+
+        Files are matched on the window encoded in their name; a file matches if its window starts
+        at or before the requested start and ends at or after the requested end. Legacy pickles
+        only encode dates, as written by the script from date-only arguments: a date-only request
+        may match from START_DATE itself, while a request with a time of day only matches from
+        midnight UTC the day after START_DATE; they end at midnight UTC of END_DATE. The first
+        match (Parquet preferred over legacy pickles) that holds all requested `columns` is loaded
+        and sliced to the requested window; Parquet files only read the requested columns from disk.
+        Days the window cuts short at either edge are dropped, as a fresh download would drop them
+        as incomplete.
+
+        Parameters:
+            symbol (str): Stock symbol (e.g., 'SPY').
+            timeframe (str): Timeframe of the bars (e.g., '5Min').
+            start (str): ISO 8601 formatted start datetime.
+            end (str): ISO 8601 formatted end datetime.
+            columns (list, optional): Bar columns needed (the symbol column is always kept); defaults to
+                                      every column stored in the file.
+
+        Returns:
+            pandas.DataFrame or None: The cached bars within `[start, end]`, or None on a miss
+                                      (including a window that holds no cached bars).
+        '''
+        start_ts, end_ts = _to_utc(start), _to_utc(end)
+        start_is_date = pd.Timestamp(start).tzinfo is None and start_ts == start_ts.normalize()
+
+        parquet_pattern = re.compile(rf'{re.escape(symbol)}_(\d{{8}}T\d{{6}}Z)_(\d{{8}}T\d{{6}}Z)_{re.escape(timeframe)}\.parquet')
+        pickle_pattern = re.compile(rf'{re.escape(symbol)}_(\d{{4}}-\d{{2}}-\d{{2}})_(\d{{4}}-\d{{2}}-\d{{2}})_{re.escape(timeframe)}\.pkl')
+
+        paths = sorted(glob.glob(os.path.join(self.root, f'{symbol}_*_{timeframe}.parquet')))
+        paths += sorted(glob.glob(os.path.join(self.root, f'{symbol}_*_{timeframe}.pkl')))
+
+        for path in paths:
+            name = os.path.basename(path)
+            if match := parquet_pattern.fullmatch(name):
+                file_start, file_end = (pd.to_datetime(d, format=_STAMP_FORMAT, utc=True) for d in match.groups())
+            elif match := pickle_pattern.fullmatch(name):
+                file_start = pd.Timestamp(match.group(1), tz='UTC')
+                if not start_is_date:
+                    file_start += pd.Timedelta(days=1)
+                file_end = pd.Timestamp(match.group(2), tz='UTC')
+            else:
+                continue
+
+            if file_start > start_ts or file_end < end_ts:
+                continue
+
+            if path.endswith('.parquet'):
+                if columns is not None:
+                    if not set(columns) <= set(pq.read_schema(path).names):
+                        continue
+                    df = pd.read_parquet(path, engine='pyarrow', columns=[*columns, 'symbol'])
+                else:
+                    df = pd.read_parquet(path, engine='pyarrow')
+            else:
+                with open(path, 'rb') as f:
+                    df = pickle.load(f)
+                if columns is not None:
+                    if not set(columns) <= set(df.columns):
+                        continue
+                    df = df[[*columns, 'symbol']]
+
+            sliced = df[(df.index >= start_ts) & (df.index <= end_ts)]
+            if not sliced.empty:
+                sliced = _drop_cut_days(df, sliced)
+            if sliced.empty:
+                # No bars in the window (e.g. a weekend); let the caller decide from a fresh download
+                continue
+
+            return sliced
+
+        return None
+
+    def put(self, symbol: str, timeframe: str, start: str, end: str, df: pd.DataFrame):
+        '''
+        Stores the processed DataFrame for a `(symbol, timeframe, start, end)` window.
+
+        Returns:
+            str: The path the DataFrame was written to.
+        '''
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(symbol, timeframe, start, end)
+        df.astype({'symbol': 'category'}).to_parquet(path, engine='pyarrow', compression='zstd')
+
+        return path
+
+    def put_many(self, df_dict: dict, timeframe: str, start: str, end: str, max_workers: int = 8):
+        '''
+        Stores several symbols' DataFrames concurrently.
+
+        Parquet encoding and compression release the GIL, so writing on a thread pool overlaps
+        disk I/O and compression across symbols instead of blocking on each file in turn.
+
+        Returns:
+            list: The paths the DataFrames were written to.
+        '''
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            paths = list(executor.map(
+                lambda item: self.put(item[0], timeframe, start, end, item[1]), df_dict.items()
+            ))
+
+        # Report from the main thread once all writes are done, so lines don't interleave
+        for symbol, path in zip(df_dict, paths):
+            print(f"Saved {symbol} data to {path}")
+
+        return paths
+
+    def _page_path(self, params: dict):
+        key = hashlib.md5(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return os.path.join(self.raw_root, f'{key}.json')
+
+    def get_page(self, params: dict):
+        '''
+        Returns the cached JSON body for a request with these query parameters, or None on a miss.
+        '''
+        path = self._page_path(params)
+        if not os.path.exists(path):
+            return None
+        self._pages_used.add(path)
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+
+    def put_page(self, params: dict, data: dict):
+        '''
+        Stores the JSON body returned for a request with these query parameters.
+        '''
+        os.makedirs(self.raw_root, exist_ok=True)
+        path = self._page_path(params)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(data))
+        os.replace(tmp_path, path)
+        self._pages_used.add(path)
+
+    def clear_pages(self):
+        '''
+        Removes the raw pages read or written through this cache, once their bars have been stored
+        as processed DataFrames. Pages of other (e.g. interrupted) downloads are left in place.
+        '''
+        for path in self._pages_used:
+            if os.path.exists(path):
+                os.remove(path)
+        self._pages_used.clear()
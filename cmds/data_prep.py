@@ -1,10 +1,26 @@
 import pandas as pd 
 import numpy as np
 
+# pandas >= 3 copies lazily (Copy-on-Write) and deprecates concat's copy keyword
+_CONCAT_KWARGS = {'copy': False} if int(pd.__version__.split('.')[0]) < 3 else {}
+
 def stack_data(df_dict: dict):
     
     df_list = [df for _, df in df_dict.items()]
 
-    stack_df = pd.concat(df_list)
+    # Align dtypes up front (shared symbol categories, common numeric dtype per column)
+    # so concat joins matching blocks without upcasting
+    dtypes = {col: np.result_type(*(df[col].dtype for df in df_list)) for col in df_list[0].columns if col != 'symbol'}
+    dtypes['symbol'] = pd.CategoricalDtype(list(df_dict.keys()))
+    # Only cast columns whose dtype actually differs; the shallow copy leaves the other columns' data shared
+    for i, df in enumerate(df_list):
+        mismatched = [col for col, dtype in dtypes.items() if df[col].dtype != dtype]
+        if mismatched:
+            df = df.copy(deep=False)
+            for col in mismatched:
+                df[col] = df[col].astype(dtypes[col])
+            df_list[i] = df
+
+    stack_df = pd.concat(df_list, sort=False, **_CONCAT_KWARGS)
 
     return stack_df
\ No newline at end of file
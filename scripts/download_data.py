@@ -1,7 +1,6 @@
 from cmds.alpaca_requests import download_intraday
 from cmds.data_prep import stack_data
-import pandas as pd
-import pickle
+from cmds.cache import FileCache
 
 if __name__ == "__main__":
     import sys
@@ -18,22 +17,14 @@ if __name__ == "__main__":
     symbols, freq, start, end, limit, api_key, secret_key = sys.argv[1:8]
 
     limit = int(limit)
-    startDate = pd.to_datetime(start).date()
-    endDate = pd.to_datetime(end).date()
 
     print(f"Downloading intraday data for {symbols.replace(',', ', ')} from {start} to {end} at {freq} resolution...")
-    df_dict = download_intraday(symbols, freq, start, end, limit, api_key, secret_key)
+    # Previously downloaded windows are reused, new downloads are saved to data/symbols as Parquet
+    df_dict = download_intraday(symbols, freq, start, end, limit, api_key, secret_key, cache=FileCache('data/symbols'))
     
     # Add df_dict to global namespace
     globals()['df_dict'] = df_dict
 
-    # Immediately pickle downloaded data for reuse
-    for symbol, df in df_dict.items():
-        with open(f'data/symbols/{symbol}_{startDate}_{endDate}_{freq}.pkl', 'wb') as f:
-            pickle.dump(df, f)
-
-        print(f"Saved {symbol} data to data/symbols/{symbol}_{startDate}_{endDate}_{freq}.pkl")
-
     if len(sys.argv) == 9:
         if sys.argv[8] == 'stack':
             stack_df = stack_data(df_dict)
@@ -0,0 +1,57 @@
+import pickle
+import pandas as pd
+from cmds.cache import FileCache
+
+def make_bars(symbol, days):
+    '''
+    Complete 5 minute regular-session bars (09:30 to 15:55 US/Eastern) for each day in `days`.
+    '''
+    index = pd.DatetimeIndex([], tz='US/Eastern')
+    for day in days:
+        index = index.append(pd.date_range(f'{day} 09:30', f'{day} 15:55', freq='5min', tz='US/Eastern'))
+    df = pd.DataFrame({'close': 1.0, 'volume': 1}, index=index)
+    df['symbol'] = symbol
+    return df
+
+WEEK = ['2022-03-07', '2022-03-08', '2022-03-09', '2022-03-10', '2022-03-11']
+
+def test_enclosing_window_is_sliced(tmp_path):
+    cache = FileCache(str(tmp_path))
+    cache.put('AAA', '5Min', '2022-03-07', '2022-03-12', make_bars('AAA', WEEK))
+
+    df = cache.get('AAA', '5Min', '2022-03-08', '2022-03-10')
+
+    assert len(df) == 2 * 78
+    assert df.index[0] == pd.Timestamp('2022-03-08 09:30', tz='US/Eastern')
+
+def test_mid_day_start_does_not_serve_midnight_start(tmp_path):
+    cache = FileCache(str(tmp_path))
+    # 03-07 was dropped as incomplete by a download starting at noon
+    cache.put('AAA', '5Min', '2022-03-07T12:00-05:00', '2022-03-12', make_bars('AAA', WEEK[1:]))
+
+    assert cache.get('AAA', '5Min', '2022-03-07', '2022-03-12') is None
+    assert len(cache.get('AAA', '5Min', '2022-03-07T12:00-05:00', '2022-03-12')) == 4 * 78
+
+def test_window_cutting_a_day_drops_it(tmp_path):
+    cache = FileCache(str(tmp_path))
+    cache.put('AAA', '5Min', '2022-03-07', '2022-03-12', make_bars('AAA', WEEK))
+
+    df = cache.get('AAA', '5Min', '2022-03-08T17:00:00Z', '2022-03-10T18:00:00Z')
+
+    assert (df.groupby(df.index.normalize()).size() == 78).all()
+    assert list(df.index.normalize().unique().strftime('%Y-%m-%d')) == ['2022-03-09']
+
+def test_window_without_bars_is_a_miss(tmp_path):
+    cache = FileCache(str(tmp_path))
+    cache.put('AAA', '5Min', '2022-03-07', '2022-03-12', make_bars('AAA', WEEK))
+
+    assert cache.get('AAA', '5Min', '2022-03-09T23:00Z', '2022-03-10T01:00Z') is None
+
+def test_legacy_pickle_matches_date_only_requests(tmp_path):
+    with open(tmp_path / 'AAA_2022-03-07_2022-03-12_5Min.pkl', 'wb') as f:
+        pickle.dump(make_bars('AAA', WEEK), f)
+    cache = FileCache(str(tmp_path))
+
+    assert len(cache.get('AAA', '5Min', '2022-03-07', '2022-03-12')) == 5 * 78
+    assert cache.get('AAA', '5Min', '2022-03-07T05:00Z', '2022-03-12') is None
+    assert cache.get('AAA', '5Min', '2022-03-07', '2022-03-13') is None